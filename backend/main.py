@@ -1,23 +1,36 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, field_validator
-from typing import Optional, Dict, Any
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, StringConstraints
+from typing import Optional, Dict, Any, Annotated
 import re
 import os
+import logging
 from datetime import datetime
-import telegram_bot
 from dotenv import load_dotenv
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.enums import ParseMode
 
 # Загружаем переменные окружения
 load_dotenv()
 
+# Импортируем после load_dotenv, чтобы модуль видел настройки из .env
+import telegram_bot
+
+# Настройка логирования (уровень задается через LOG_LEVEL)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title="Contact Form API",
     description="API для обработки контактной формы с отправкой в Telegram",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# Настройка CORS - добавляем больше разрешенных источников
+# Настройка CORS - только явные источники (в продакшене запросы идут через nginx /api)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -26,73 +39,85 @@ app.add_middleware(
         "http://localhost:3000",
         "http://localhost:80",
         "http://localhost",
-        "*"  # В продакшене лучше указать конкретные домены
     ],
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
-    allow_headers=["*"],
+    allow_headers=["Content-Type"],
+    max_age=86400,  # Браузер кэширует preflight OPTIONS на сутки
 )
 
 # Настройки Telegram бота из переменных окружения
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
-print(f"🔧 TELEGRAM_BOT_TOKEN: {'✅ Установлен' if TELEGRAM_BOT_TOKEN else '❌ Не установлен'}")
-print(f"🔧 TELEGRAM_CHAT_ID: {'✅ Установлен' if TELEGRAM_CHAT_ID else '❌ Не установлен'}")
+logger.info("🔧 TELEGRAM_BOT_TOKEN: %s", '✅ Установлен' if TELEGRAM_BOT_TOKEN else '❌ Не установлен')
+logger.info("🔧 TELEGRAM_CHAT_ID: %s", '✅ Установлен' if TELEGRAM_CHAT_ID else '❌ Не установлен')
 
 if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
-    print("⚠️ ВНИМАНИЕ: Telegram бот не настроен. Установите переменные окружения TELEGRAM_BOT_TOKEN и TELEGRAM_CHAT_ID")
+    logger.warning("⚠️ ВНИМАНИЕ: Telegram бот не настроен. Установите переменные окружения TELEGRAM_BOT_TOKEN и TELEGRAM_CHAT_ID")
+
+@app.on_event("startup")
+async def startup():
+    """Создаем один бот на всё время жизни приложения (переиспользуем HTTP-сессию)"""
+    app.state.bot = None
+    if TELEGRAM_BOT_TOKEN:
+        # Ограниченный пул соединений с keep-alive для api.telegram.org
+        # (кэш DNS aiogram уже включает сам, SSL контекст сохраняем через update)
+        session = AiohttpSession(limit=32)
+        session._connector_init.update(keepalive_timeout=75)
+        app.state.bot = Bot(
+            token=TELEGRAM_BOT_TOKEN,
+            session=session,
+            default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+        )
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Закрываем сессию бота при остановке приложения"""
+    if app.state.bot is not None:
+        await app.state.bot.session.close()
+
+# Обязательное текстовое поле: пробелы по краям обрезаются, минимум 2 символа
+NonEmpty = Annotated[str, StringConstraints(min_length=2, strip_whitespace=True)]
 
 # Модель для формы с вопросами/ответами
 class QuestionForm(BaseModel):
-    question1: str
-    answer1: str
-    question2: str
-    answer2: str
-    question3: str
-    answer3: str
-
-    @field_validator('question1', 'question2', 'question3', 'answer1', 'answer2', 'answer3')
-    @classmethod
-    def validate_fields(cls, v):
-        if not v or len(v.strip()) == 0:
-            raise ValueError('Поле обязательно для заполнения')
-        if len(v.strip()) < 2:
-            raise ValueError('Минимум 2 символа')
-        return v.strip()
+    question1: NonEmpty
+    answer1: NonEmpty
+    question2: NonEmpty
+    answer2: NonEmpty
+    question3: NonEmpty
+    answer3: NonEmpty
 
 @app.get("/")
 async def root():
     return {"message": "Contact Form API работает!", "status": "ok"}
 
 @app.post("/submit-questions")
-async def submit_questions(form_data: QuestionForm):
+async def submit_questions(form_data: QuestionForm, background: BackgroundTasks):
     """Эндпоинт для отправки формы с вопросами/ответами"""
-    try:
-        print(f"📝 Получены данные вопросов: {form_data}")
-        
-        # Отправляем в Telegram если бот настроен
-        telegram_success = {"message_sent": False, "excel_sent": False}
-        if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-            print("📤 Отправляем данные в Telegram...")
-            telegram_success = await telegram_bot.send_form_data(
-                TELEGRAM_BOT_TOKEN, 
-                TELEGRAM_CHAT_ID, 
-                form_data.model_dump()
-            )
-            print(f"✅ Результат отправки: {telegram_success}")
-        else:
-            print("⚠️ Telegram бот не настроен")
-        
-        return {
-            "status": "success",
-            "message": "Форма с вопросами успешно отправлена!",
-            "telegram_status": telegram_success,
-            "data": form_data.model_dump()
-        }
-    except Exception as e:
-        print(f"❌ Ошибка при обработке формы: {e}")
-        raise HTTPException(status_code=400, detail=str(e))
+    logger.debug("📝 Получены данные вопросов: %s", form_data)
+    payload = form_data.model_dump()
+    
+    # Отправляем в Telegram в фоне, уже после ответа клиенту
+    telegram_queued = bool(TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID)
+    if telegram_queued:
+        logger.debug("📤 Ставим отправку данных в Telegram в очередь...")
+        background.add_task(
+            telegram_bot.send_form_data,
+            app.state.bot,
+            TELEGRAM_CHAT_ID, 
+            payload
+        )
+    else:
+        logger.debug("⚠️ Telegram бот не настроен")
+    
+    return {
+        "status": "success",
+        "message": "Форма с вопросами успешно отправлена!",
+        "telegram_queued": telegram_queued,
+        "data": payload
+    }
 
 @app.get("/health")
 async def health_check():
@@ -105,4 +130,15 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    if os.getenv("DEV"):
+        # Режим разработки: автоперезагрузка при изменении файлов
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=int(os.getenv("WORKERS", "4")),
+            loop="auto",
+            http="httptools"
+        )
\ No newline at end of file
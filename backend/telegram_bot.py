@@ -1,19 +1,100 @@
 import asyncio
 import logging
-from typing import Dict, Any
-import pandas as pd
+from typing import Dict, Any, List, Tuple
 from io import BytesIO
 import os
+import re
+import zipfile
+from xml.sax.saxutils import escape
 from datetime import datetime
 from aiogram import Bot
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.types import BufferedInputFile
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Отправлять ли вместе с сообщением Excel файл (GENERATE_EXCEL=0 отключает)
+GENERATE_EXCEL = os.getenv("GENERATE_EXCEL", "1") == "1"
+
+# Пары ключей вопрос/ответ в данных формы
+FORM_KEYS = (('question1', 'answer1'), ('question2', 'answer2'), ('question3', 'answer3'))
+
+# Статические части XLSX файла (меняется только лист с данными)
+EXCEL_SHEET_NAME = 'Данные формы'
+EXCEL_HEADERS = ('Номер вопроса', 'Вопрос', 'Ответ', 'Дата отправки')
+EXCEL_COLUMNS = 'ABCD'
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    f'<sheets><sheet name="{EXCEL_SHEET_NAME}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Стиль 0 - обычная ячейка, стиль 1 - жирный заголовок
+XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+def _answered_pairs(form_data: Dict[str, Any]) -> List[Tuple[int, Any, Any]]:
+    """Заполненные пары (номер, вопрос, ответ) из данных формы"""
+    pairs = []
+    for i, (question_key, answer_key) in enumerate(FORM_KEYS, 1):
+        question = form_data.get(question_key)
+        answer = form_data.get(answer_key)
+        if question and answer:
+            pairs.append((i, question, answer))
+    return pairs
+
+# Управляющие символы, запрещенные в XML 1.0
+XML_ILLEGAL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def _xlsx_cell(ref: str, value: Any, style: int = 0) -> str:
+    """XML одной ячейки: числа как есть, всё остальное как inline-строка"""
+    if isinstance(value, int):
+        return f'<c r="{ref}" s="{style}"><v>{value}</v></c>'
+    text = escape(XML_ILLEGAL_CHARS.sub("", str(value)))
+    return f'<c r="{ref}" s="{style}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
 async def send_message(bot: Bot, chat_id: str, text: str) -> bool:
     """Отправка текстового сообщения"""
     try:
@@ -39,76 +120,88 @@ async def send_document(bot: Bot, chat_id: str, file_bytes: bytes, filename: str
         logger.error(f"❌ Ошибка при отправке документа: {e}")
         return False
 
-def create_excel_file(form_data: Dict[str, Any]) -> bytes:
+def create_excel_file(form_data: Dict[str, Any], timestamp: str) -> BytesIO:
     """Создание Excel файла из данных формы с вопросами/ответами"""
     logger.info("📊 Создание Excel файла...")
     
-    # Подготавливаем данные для Excel
-    data = []
+    # Подготавливаем строки для Excel
+    rows = [(i, question, answer, timestamp) for i, question, answer in _answered_pairs(form_data)]
     
-    for i in range(1, 4):
-        question_key = f'question{i}'
-        answer_key = f'answer{i}'
-        if form_data.get(question_key) and form_data.get(answer_key):
-            data.append({
-                'Номер вопроса': i,
-                'Вопрос': form_data[question_key],
-                'Ответ': form_data[answer_key],
-                'Дата отправки': datetime.now().strftime('%d.%m.%Y %H:%M')
-            })
+    # Ширина колонок по самому длинному значению
+    widths = [
+        min(max(len(str(row[col])) for row in (EXCEL_HEADERS, *rows)) + 2, 50)
+        for col in range(len(EXCEL_HEADERS))
+    ]
+    cols_xml = "".join(
+        f'<col min="{n}" max="{n}" width="{width}" customWidth="1"/>'
+        for n, width in enumerate(widths, 1)
+    )
     
-    # Создаем DataFrame и Excel файл
-    df = pd.DataFrame(data)
+    # Собираем XML листа: заголовок + строки с данными
+    sheet_rows = [
+        f'<row r="1">'
+        + "".join(_xlsx_cell(f"{col}1", value, 1) for col, value in zip(EXCEL_COLUMNS, EXCEL_HEADERS))
+        + '</row>'
+    ]
+    for r, row in enumerate(rows, 2):
+        sheet_rows.append(
+            f'<row r="{r}">'
+            + "".join(_xlsx_cell(f"{col}{r}", value) for col, value in zip(EXCEL_COLUMNS, row))
+            + '</row>'
+        )
+    sheet_xml = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        f'<cols>{cols_xml}</cols>'
+        f'<sheetData>{"".join(sheet_rows)}</sheetData>'
+        '</worksheet>'
+    )
     
-    # Создаем Excel в памяти
+    # Упаковываем XLSX в памяти
     excel_buffer = BytesIO()
-    with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Данные формы')
-        
-        # Автоматическая настройка ширины колонок
-        worksheet = writer.sheets['Данные формы']
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
+    with zipfile.ZipFile(excel_buffer, "w", zipfile.ZIP_DEFLATED) as xlsx:
+        xlsx.writestr("[Content_Types].xml", XLSX_CONTENT_TYPES)
+        xlsx.writestr("_rels/.rels", XLSX_ROOT_RELS)
+        xlsx.writestr("xl/workbook.xml", XLSX_WORKBOOK)
+        xlsx.writestr("xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS)
+        xlsx.writestr("xl/styles.xml", XLSX_STYLES)
+        xlsx.writestr("xl/worksheets/sheet1.xml", sheet_xml)
     
     excel_buffer.seek(0)
     logger.info("✅ Excel файл создан успешно")
-    return excel_buffer.getvalue()
+    return excel_buffer
 
-def format_message(form_data: Dict[str, Any]) -> str:
+def format_message(form_data: Dict[str, Any], timestamp: str) -> str:
     """Форматирование данных формы в текстовое сообщение"""
-    timestamp = datetime.now().strftime('%d.%m.%Y в %H:%M')
-    
-    message = f"📝 <b>Новая форма с вопросами</b>\n"
-    message += f"🕐 Отправлено: {timestamp}\n\n"
+    body = "".join(
+        f"❓ <b>Вопрос {i}:</b>\n{question}\n\n"
+        f"✅ <b>Ответ {i}:</b>\n{answer}\n\n"
+        "─────────────────\n\n"
+        for i, question, answer in _answered_pairs(form_data)
+    )
     
-    for i in range(1, 4):
-        question_key = f'question{i}'
-        answer_key = f'answer{i}'
-        if form_data.get(question_key) and form_data.get(answer_key):
-            message += f"❓ <b>Вопрос {i}:</b>\n{form_data[question_key]}\n\n"
-            message += f"✅ <b>Ответ {i}:</b>\n{form_data[answer_key]}\n\n"
-            message += "─────────────────\n\n"
+    return f"📝 <b>Новая форма с вопросами</b>\n🕐 Отправлено: {timestamp}\n\n{body}"
+
+async def _send_excel(bot: Bot, chat_id: str, excel_task: "asyncio.Task[BytesIO]", filename: str) -> bool:
+    """Ожидание собранного Excel файла и его отправка"""
+    try:
+        excel_buffer = await excel_task
+    except Exception as e:
+        logger.error(f"❌ Ошибка создания Excel файла: {e}")
+        return False
     
-    return message
+    caption = "📊 Данные формы в формате Excel"
+    return await send_document(bot, chat_id, excel_buffer.getvalue(), filename, caption)
 
-async def send_form_data(bot_token: str, chat_id: str, form_data: Dict[str, Any]) -> Dict[str, bool]:
+async def send_form_data(bot: Bot, chat_id: str, form_data: Dict[str, Any]) -> Dict[str, bool]:
     """Отправка данных формы (сообщение + Excel файл)"""
     logger.info(f"📤 Начинаем отправку данных в чат {chat_id}")
     
-    # Создаем бота
-    bot = Bot(
-        token=bot_token,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-    )
+    # Время отправки берем один раз для сообщения, Excel файла и имени файла
+    now = datetime.now()
+    message_timestamp = now.strftime('%d.%m.%Y в %H:%M')
+    excel_timestamp = now.strftime('%d.%m.%Y %H:%M')
+    filename = f"form_data_{now.strftime('%Y%m%d_%H%M%S')}.xlsx"
     
     results = {
         "message_sent": False,
@@ -116,20 +209,19 @@ async def send_form_data(bot_token: str, chat_id: str, form_data: Dict[str, Any]
     }
     
     try:
-        # Отправляем текстовое сообщение
+        if GENERATE_EXCEL:
+            # Excel файл собираем в отдельном потоке, пока отправляется сообщение
+            excel_task = asyncio.create_task(
+                asyncio.to_thread(create_excel_file, form_data, excel_timestamp)
+            )
+        
         logger.info("📨 Отправляем текстовое сообщение...")
-        message_text = format_message(form_data)
-        results["message_sent"] = await send_message(bot, chat_id, message_text)
+        results["message_sent"] = await send_message(bot, chat_id, format_message(form_data, message_timestamp))
         
-        # Создаем и отправляем Excel файл
-        logger.info("📊 Создаем и отправляем Excel файл...")
-        try:
-            excel_bytes = create_excel_file(form_data)
-            filename = f"form_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            caption = "📊 Данные формы в формате Excel"
-            results["excel_sent"] = await send_document(bot, chat_id, excel_bytes, filename, caption)
-        except Exception as e:
-            logger.error(f"❌ Ошибка создания Excel файла: {e}")
+        if GENERATE_EXCEL:
+            # Документ отправляем после сообщения, чтобы сохранить порядок в чате
+            logger.info("📊 Отправляем Excel файл...")
+            results["excel_sent"] = await _send_excel(bot, chat_id, excel_task, filename)
         
         logger.info(f"📋 Результат отправки: {results}")
         return results
@@ -137,14 +229,6 @@ async def send_form_data(bot_token: str, chat_id: str, form_data: Dict[str, Any]
     except Exception as e:
         logger.error(f"❌ Общая ошибка при отправке: {e}")
         return results
-    
-    finally:
-        # Закрываем сессию бота
-        try:
-            await bot.session.close()
-            logger.info("🔐 Сессия бота закрыта")
-        except:
-            pass
 
 async def test_bot_connection(bot_token: str) -> bool:
     """Тестирование подключения к боту"""
@@ -17,10 +17,7 @@ interface FormErrors {
 interface ApiResponse {
   status: string;
   message: string;
-  telegram_status?: {
-    message_sent: boolean;
-    excel_sent: boolean;
-  };
+  telegram_queued?: boolean;
   data?: FormData;
 }
 
@@ -178,15 +175,10 @@ function App() {
         let message = result.message;
         
         // Добавляем информацию о статусе Telegram
-        if (result.telegram_status) {
-          const { message_sent, excel_sent } = result.telegram_status;
-          if (message_sent && excel_sent) {
-            message += ' Данные отправлены в Telegram!';
-          } else if (message_sent) {
-            message += ' Сообщение отправлено в Telegram (Excel файл не отправлен)';
-          } else {
-            message += ' (Ошибка отправки в Telegram)';
-          }
+        if (result.telegram_queued) {
+          message += ' Данные будут отправлены в Telegram!';
+        } else {
+          message += ' (Telegram бот не настроен)';
         }
         
         setSubmitMessage(message);
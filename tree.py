@@ -1,7 +1,27 @@
 import os
+import sys
 from pathlib import Path
 
-def draw_tree(directory, prefix="", max_depth=None, current_depth=0):
+# Иконки файлов по расширению
+_ICONS = {
+    '.py': '🐍',
+    '.js': '🟨',
+    '.html': '🌐',
+    '.css': '🎨',
+    '.json': '⚙️',
+    '.txt': '📝',
+    '.md': '📖',
+    '.pdf': '📕',
+    '.jpg': '🖼️',
+    '.png': '🖼️',
+    '.gif': '🎞️',
+    '.zip': '📦',
+    '.exe': '⚙️',
+    '.bat': '⚙️',
+    '.sh': '⚙️',
+}
+
+def draw_tree(directory, prefix="", max_depth=None, current_depth=0, out=None):
     """
     Рисует красивое дерево файлов
     
@@ -10,71 +30,74 @@ def draw_tree(directory, prefix="", max_depth=None, current_depth=0):
         prefix: префикс для отступов
         max_depth: максимальная глубина (None = без ограничений)
         current_depth: текущая глубина
+        out: список, в который добавляются строки (None = сразу вывести в stdout)
     """
-    if max_depth is not None and current_depth >= max_depth:
-        return
+    own_output = out is None
+    if own_output:
+        out = []
+    # Стек открытых директорий: [элементы, индекс следующего, префикс, глубина]
+    stack = []
+    
+    def open_dir(path, dir_prefix, depth):
+        if max_depth is not None and depth >= max_depth:
+            return
+        try:
+            # Получаем список файлов и папок
+            # Сортируем: сначала папки, потом файлы
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: (not e.is_dir(follow_symlinks=False), e.name.lower()))
+            stack.append([entries, 0, dir_prefix, depth])
+        except PermissionError:
+            out.append(f"{dir_prefix}├── ❌ [Нет доступа]\n")
+        except Exception as e:
+            out.append(f"{dir_prefix}├── ❌ [Ошибка: {e}]\n")
     
-    try:
-        # Получаем список файлов и папок
-        items = list(Path(directory).iterdir())
-        # Сортируем: сначала папки, потом файлы
-        items.sort(key=lambda x: (x.is_file(), x.name.lower()))
+    open_dir(directory, prefix, current_depth)
+    
+    while stack:
+        frame = stack[-1]
+        entries, i, dir_prefix, depth = frame
+        if i == len(entries):
+            # Директория обойдена
+            stack.pop()
+            continue
+        frame[1] = i + 1
+        
+        entry = entries[i]
+        # Определяем, последний ли это элемент
+        is_last = i == len(entries) - 1
+        
+        # Выбираем символы для рисования
+        if is_last:
+            branch = "└── "
+            extension = "    "
+        else:
+            branch = "├── "
+            extension = "│   "
         
-        for i, item in enumerate(items):
-            # Определяем, последний ли это элемент
-            is_last = i == len(items) - 1
-            
-            # Выбираем символы для рисования
-            if is_last:
-                branch = "└── "
-                extension = "    "
-            else:
-                branch = "├── "
-                extension = "│   "
-            
-            # Получаем иконку
-            if item.is_dir():
-                icon = "📁"
-                name = item.name + "/"
-            else:
-                icon = get_file_icon(item.name)
-                name = item.name
-            
-            # Выводим строку
-            print(f"{prefix}{branch}{icon} {name}")
-            
-            # Если это папка, рекурсивно обходим её
-            if item.is_dir():
-                draw_tree(item, prefix + extension, max_depth, current_depth + 1)
-                
-    except PermissionError:
-        print(f"{prefix}├── ❌ [Нет доступа]")
-    except Exception as e:
-        print(f"{prefix}├── ❌ [Ошибка: {e}]")
+        # Получаем иконку
+        is_dir = entry.is_dir(follow_symlinks=False)
+        if is_dir:
+            icon = "📁"
+            name = entry.name + "/"
+        else:
+            icon = get_file_icon(entry.name)
+            name = entry.name
+        
+        # Добавляем строку
+        out.append(f"{dir_prefix}{branch}{icon} {name}\n")
+        
+        # Если это папка, сразу открываем её (обход в глубину)
+        if is_dir:
+            open_dir(entry.path, dir_prefix + extension, depth + 1)
+    
+    if own_output:
+        sys.stdout.write("".join(out))
 
 def get_file_icon(filename):
     """Возвращает иконку для файла по расширению"""
-    ext = Path(filename).suffix.lower()
-    
-    icons = {
-        '.py': '🐍',
-        '.js': '🟨',
-        '.html': '🌐',
-        '.css': '🎨',
-        '.json': '⚙️',
-        '.txt': '📝',
-        '.md': '📖',
-        '.pdf': '📕',
-        '.jpg': '🖼️',
-        '.png': '🖼️',
-        '.gif': '🎞️',
-        '.zip': '📦',
-        '.exe': '⚙️',
-        '.bat': '⚙️',
-        '.sh': '⚙️',
-    }
-    
-    return icons.get(ext, '📄')
+    dot = filename.rfind('.')
+    return _ICONS.get(filename[dot:].lower(), '📄') if dot >= 0 else '📄'
 
 def print_tree(path=".", max_depth=None, title=None):
     """
@@ -95,16 +118,22 @@ def print_tree(path=".", max_depth=None, title=None):
         print(f"❌ Это не директория: {path}")
         return
     
-    # Печатаем заголовок
+    out = []
+    
+    # Заголовок
     if title:
-        print(f"\n🌳 {title}")
-        print("=" * (len(title) + 3))
+        out.append(f"\n🌳 {title}\n")
+        out.append("=" * (len(title) + 3) + "\n")
+    
+    # Корневая папка
+    out.append(f"📁 {directory.name}/\n")
     
-    # Печатаем корневую папку
-    print(f"📁 {directory.name}/")
+    # Дерево
+    draw_tree(directory, "", max_depth, out=out)
     
-    # Печатаем дерево
-    draw_tree(directory, "", max_depth)
+    # Выводим всё одной записью
+    sys.stdout.write("".join(out))
+    sys.stdout.flush()
 
 # Примеры использования
 if __name__ == "__main__":